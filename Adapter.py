@@ -1,10 +1,15 @@
 import math
+from array import array
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 
 class RoundPeg:
     """
     RoundPeg(s) are compatible with RoundHole(s)
     """
+    __slots__ = ("_radius",)
+
     def __init__(self, radius: float):
         self._radius = radius
 
@@ -16,6 +21,8 @@ class RoundHole:
     """
     RoundHole(s) are compatible with RoundPeg(s)
     """
+    __slots__ = ("_radius",)
+
     def __init__(self, radius: float):
         self._radius = radius
 
@@ -25,12 +32,30 @@ class RoundHole:
     def fits(self, peg: RoundPeg) -> bool:
         return self.getRadius() >= peg.getRadius()
 
+    def fitsMany(self, radii: Iterable[float]) -> List[bool]:
+        """
+        Batch version of fits(): it works on plain radii (e.g. an array('d')) instead of peg objects, so no method
+        call is paid per peg.
+        """
+        radius = self.getRadius()
+        return [radius >= r for r in radii]
+
+
+def squareWidthsToRadii(widths: Iterable[float]) -> array:
+    """
+    Converts many SquarePeg widths at once, using the same formula as SquarePegAdapter.getRadius().
+    """
+    sqrt2 = math.sqrt(2)
+    return array("d", (w * sqrt2 / 2 for w in widths))
+
 
 class SquarePeg:
     """
     SquarePeg(s) are not compatible with RoundHole(s).
     But we need to integrate them into our program.
     """
+    __slots__ = ("_width",)
+
     def __init__(self, width: float):
         self._width = width
 
@@ -41,13 +66,120 @@ class SquarePeg:
 class SquarePegAdapter:
     """
     The Adapter Adapter allows fitting square pegs into round holes.
+    The radius is computed on first use and cached, since a SquarePeg's width never changes.
     """
+    __slots__ = ("squarePeg", "_radius")
 
     def __init__(self, squarePeg: SquarePeg):
         self.squarePeg = squarePeg
+        self._radius: Optional[float] = None
 
     def getRadius(self) -> float:
-        return self.squarePeg.getWidth() * math.sqrt(2) / 2
+        if self._radius is None:
+            self._radius = self.squarePeg.getWidth() * math.sqrt(2) / 2
+        return self._radius
+
+
+class AdapterRegistry:
+    """
+    Maps shape types to the adapter class that gives them the getRadius() protocol, so callers can adapt any
+    registered shape without knowing its adapter. Adapters are looked up along the shape's MRO, which means
+    subclasses of a registered shape are adapted too.
+    """
+
+    def __init__(self) -> None:
+        self._adapters: Dict[type, Callable[[Any], Any]] = {}
+
+    def register(self, shapeType: type, adapter: Optional[Callable[[Any], Any]] = None):
+        """
+        Registers an adapter for shapeType. Can also be used as a class decorator on the adapter.
+        """
+        if adapter is None:
+            def decorator(adapterClass):
+                self._adapters[shapeType] = adapterClass
+                return adapterClass
+            return decorator
+        self._adapters[shapeType] = adapter
+        return adapter
+
+    def adapt(self, shape: Any) -> Any:
+        """
+        Returns the shape itself if it already has getRadius(), otherwise a registered adapter wrapping it.
+        """
+        if hasattr(shape, "getRadius"):
+            return shape
+        for shapeType in type(shape).__mro__:
+            adapter = self._adapters.get(shapeType)
+            if adapter is not None:
+                return adapter(shape)
+        raise TypeError(f"No adapter registered for {type(shape).__name__}")
+
+
+registry = AdapterRegistry()
+registry.register(SquarePeg, SquarePegAdapter)
+
+
+class HoleAssigner:
+    """
+    Assigns each peg (a RoundPeg or anything adapted to getRadius()) to the smallest free RoundHole that fits it.
+    Holes are sorted by radius once, so every peg costs a binary search instead of a fits() call per hole. Full
+    holes are skipped with a union-find "next free hole" pointer instead of being deleted from the sorted list,
+    which keeps the whole matching at O((pegs + holes) log holes).
+    Holes added with addHole() after construction are merged in with one re-sort before the next assignment, so
+    add them in bulk rather than between pegs.
+    """
+
+    def __init__(self, holes: Iterable[RoundHole], capacity: int = 1) -> None:
+        self._holes: List[RoundHole] = []
+        self._free: List[int] = []
+        for hole in holes:
+            self.addHole(hole, capacity)
+        self._rebuild()
+
+    def addHole(self, hole: RoundHole, capacity: int = 1) -> None:
+        if capacity < 1:
+            raise ValueError(f"A hole must take at least one peg, got capacity {capacity}")
+        self._holes.append(hole)
+        self._free.append(capacity)
+        self._stale = True
+
+    def _rebuild(self) -> None:
+        self._order = sorted((key for key, free in enumerate(self._free) if free),
+                             key=lambda key: self._holes[key].getRadius())
+        self._radii = [self._holes[key].getRadius() for key in self._order]
+        # _next[i] leads to the first sorted position >= i whose hole still has room; len(_order) means none
+        self._next = list(range(len(self._order) + 1))
+        self._stale = False
+
+    def _findFree(self, position: int) -> int:
+        root = position
+        while self._next[root] != root:
+            root = self._next[root]
+        while self._next[position] != root:  # Path compression
+            self._next[position], position = root, self._next[position]
+        return root
+
+    def assign(self, peg: RoundPeg) -> Optional[RoundHole]:
+        """
+        Returns the smallest hole that still has room for the peg, or None if there is none.
+        """
+        if self._stale:
+            self._rebuild()
+        position = self._findFree(bisect_left(self._radii, peg.getRadius()))
+        if position == len(self._order):
+            return None
+        key = self._order[position]
+        self._free[key] -= 1
+        if not self._free[key]:
+            self._next[position] = position + 1
+        return self._holes[key]
+
+    def assignAll(self, pegs: Iterable[RoundPeg]) -> Iterator[Tuple[RoundPeg, Optional[RoundHole]]]:
+        """
+        Streams (peg, hole) pairs, so pegs can come from any iterator.
+        """
+        for peg in pegs:
+            yield peg, self.assign(peg)
 
 
 if __name__ == "__main__":
@@ -69,3 +201,34 @@ if __name__ == "__main__":
         print("Square peg w2 fits round hole r5!")
     if not hole.fits(largeSqPegAdapter):
         print("Square peg w20 does not fit into round hole r5!")
+
+    # The registry picks the right adapter by itself.
+    if hole.fits(registry.adapt(smallSqPeg)) and hole.fits(registry.adapt(rpeg)):
+        print("The registry adapted both the square peg w2 and the round peg r5!")
+
+    # Best-fit assignment of pegs to holes.
+    assigner = HoleAssigner([RoundHole(3), RoundHole(5), RoundHole(10)])
+    shapes = [RoundPeg(4), SquarePeg(6), RoundPeg(4), RoundPeg(1)]
+    for peg, assigned in assigner.assignAll(registry.adapt(shape) for shape in shapes):
+        if assigned:
+            print(f"Peg r{peg.getRadius():.2f} goes into round hole r{assigned.getRadius()}")
+        else:
+            print(f"Peg r{peg.getRadius():.2f} has no free hole left")
+
+    # Batch fitting: plain radii instead of one adapter object per peg.
+    import random
+    import time
+
+    widths = array("d", (random.uniform(0, 10) for _ in range(1_000_000)))
+    adapters = [SquarePegAdapter(SquarePeg(w)) for w in widths]
+
+    start = time.perf_counter()
+    loopMask = [hole.fits(adapter) for adapter in adapters]
+    loopTime = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batchMask = hole.fitsMany(squareWidthsToRadii(widths))
+    batchTime = time.perf_counter() - start
+
+    assert loopMask == batchMask
+    print(f"Per-object loop: {loopTime:.3f}s, batch: {batchTime:.3f}s ({sum(batchMask)} pegs fit)")
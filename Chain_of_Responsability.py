@@ -1,5 +1,27 @@
+import asyncio
+import inspect
+import os
+import time
 from abc import ABC, abstractmethod
-from typing import Optional
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class HandlerStats:
+    """
+    How many requests a handler was offered, how many it ate and the time it spent on them.
+    """
+    __slots__ = ("offered", "accepted", "seconds")
+
+    def __init__(self) -> None:
+        self.offered = 0
+        self.accepted = 0
+        self.seconds = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {"offered": self.offered, "accepted": self.accepted, "seconds": self.seconds}
 
 
 class BaseHandler(ABC):
@@ -8,6 +30,7 @@ class BaseHandler(ABC):
     It also declares a method for executing a request.
     """
     _next_handler: Optional["BaseHandler"] = None
+    key: Optional[str] = None  # The exact request this handler eats, if it matches on a single key
 
     def set_next(self, handler: "BaseHandler") -> "BaseHandler":
         self._next_handler = handler
@@ -19,6 +42,22 @@ class BaseHandler(ABC):
             return self._next_handler.handle(request)
         return None
 
+    def accepts(self, request: str) -> bool:
+        """
+        Handlers that match on a predicate instead of a key override this, so a compiled chain can test them without
+        walking down the rest of the chain.
+        """
+        return request == self.key
+
+    def compile(self) -> "CompiledChain":
+        return CompiledChain(self)
+
+    @property
+    def stats(self) -> HandlerStats:
+        if "_stats" not in self.__dict__:
+            self._stats = HandlerStats()
+        return self._stats
+
 
 """
 All Concrete Handlers either handle a request or pass it to the next handler in
@@ -27,29 +66,230 @@ the chain.
 
 
 class MonkeyHandler(BaseHandler):
+    key = "Banana"
+
     def handle(self, request: str) -> str:
-        if request == "Banana":
+        if request == self.key:
             return f"Monkey: I'll eat the {request}"
         else:
             return super().handle(request)
 
 
 class SquirrelHandler(BaseHandler):
+    key = "Nut"
+
     def handle(self, request: str) -> str:
-        if request == "Nut":
+        if request == self.key:
             return f"Squirrel: I'll eat the {request}"
         else:
             return super().handle(request)
 
 
 class DogHandler(BaseHandler):
+    key = "MeatBall"
+
     def handle(self, request: str) -> str:
-        if request == "MeatBall":
+        if request == self.key:
             return f"Dog: I'll eat the {request}"
         else:
             return super().handle(request)
 
 
+class CompiledChain:
+    """
+    A snapshot of a chain, starting from any handler, turned into a dispatch table. Keyed handlers are found with
+    a dict lookup and only predicate handlers placed before the match are tested, so the first handler that would
+    eat the request still wins. The chain is walked with a loop, so long chains don't hit the recursion limit.
+    A handler that is neither keyed nor a predicate can't be compiled: the rest of the chain is delegated to it.
+    """
+
+    def __init__(self, handler: BaseHandler) -> None:
+        self._keyed: Dict[str, Tuple[int, BaseHandler]] = {}
+        self._predicates: List[Tuple[int, BaseHandler]] = []
+        self._tail: Optional[Tuple[int, BaseHandler]] = None
+        position = 0
+        while handler:
+            if handler.key is not None:
+                self._keyed.setdefault(handler.key, (position, handler))
+            elif type(handler).accepts is not BaseHandler.accepts:
+                self._predicates.append((position, handler))
+            else:
+                self._tail = (position, handler)
+                break
+            handler = handler._next_handler
+            position += 1
+
+    def handle(self, request: str) -> Optional[str]:
+        match = self._keyed.get(request, self._tail)
+        limit = match[0] if match else float("inf")
+        for position, handler in self._predicates:
+            if position > limit:
+                break
+            if handler.accepts(request):
+                return handler.handle(request)
+        if match:
+            return match[1].handle(request)
+        return None
+
+
+class InstrumentedChain:
+    """
+    Walks a snapshot of a chain with a loop and records the HandlerStats of every handler on the way.
+    In adaptive mode, every `reorder_every` requests the handlers that eat the most are moved to the front. Only
+    runs of keyed handlers are reordered, since two different keys can never compete for the same request; a
+    predicate handler keeps its place and splits the runs around it. As in CompiledChain, a handler that is neither
+    keyed nor a predicate ends the snapshot and the rest of the chain is delegated to it.
+    """
+
+    def __init__(self, handler: BaseHandler, adaptive: bool = False, reorder_every: int = 1000) -> None:
+        self._handlers: List[BaseHandler] = []
+        self._tail: Optional[BaseHandler] = None
+        while handler:
+            if handler.key is None and type(handler).accepts is BaseHandler.accepts:
+                self._tail = handler
+                break
+            self._handlers.append(handler)
+            handler = handler._next_handler
+        self._adaptive = adaptive
+        self._reorder_every = reorder_every
+        self._requests = 0
+
+    def handle(self, request: str) -> Optional[str]:
+        self._requests += 1
+        if self._adaptive and not self._requests % self._reorder_every:
+            self.reorder()
+        for handler in self._handlers:
+            stats = handler.stats
+            start = time.perf_counter()
+            accepted = handler.accepts(request)
+            result = handler.handle(request) if accepted else None
+            stats.seconds += time.perf_counter() - start
+            stats.offered += 1
+            if accepted:
+                stats.accepted += 1
+                return result
+        if self._tail:
+            stats = self._tail.stats
+            start = time.perf_counter()
+            result = self._tail.handle(request)
+            stats.seconds += time.perf_counter() - start
+            stats.offered += 1
+            return result
+        return None
+
+    def reorder(self) -> None:
+        """
+        Sorts every run of keyed handlers by accepted requests, most frequent first. The sort is stable, so a
+        handler shadowed by an earlier one with the same key never overtakes it.
+        """
+        ordered: List[BaseHandler] = []
+        run: List[BaseHandler] = []
+        for handler in self._handlers + [None]:
+            if handler is not None and handler.key is not None:
+                run.append(handler)
+                continue
+            ordered.extend(sorted(run, key=lambda h: -h.stats.accepted))
+            run = []
+            if handler is not None:
+                ordered.append(handler)
+        self._handlers = ordered
+
+    @property
+    def order(self) -> List[BaseHandler]:
+        return list(self._handlers)
+
+    def dump_stats(self) -> List[Dict[str, float]]:
+        """
+        One entry per handler, in the current chain order.
+        """
+        handlers = self._handlers + ([self._tail] if self._tail else [])
+        return [{"handler": type(handler).__name__, **handler.stats.as_dict()} for handler in handlers]
+
+    def reset_stats(self) -> None:
+        for handler in self._handlers + ([self._tail] if self._tail else []):
+            handler._stats = HandlerStats()
+
+
+_worker_handler: Optional[BaseHandler] = None
+
+
+def _init_worker(handler: BaseHandler) -> None:
+    # Each worker process unpickles the chain once, instead of once per request.
+    global _worker_handler
+    _worker_handler = handler
+
+
+def _handle_in_worker(request: str) -> Optional[str]:
+    return _worker_handler.handle(request)
+
+
+def handle_batch(handler: BaseHandler, requests: Iterable[str], executor: Optional[str] = None,
+                 max_workers: Optional[int] = None, ordered: bool = True) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    Streams (request, result) pairs for a batch of requests. With executor=None the requests are handled one
+    after the other on the calling thread; "thread" suits handlers doing I/O and "process" suits CPU-bound ones.
+    Pools only keep a bounded window of requests in flight, so `requests` can be an endless iterator.
+    With ordered=False results are yielded as soon as they are ready.
+    """
+    if executor is None:
+        for request in requests:
+            yield request, handler.handle(request)
+        return
+
+    pool: Executor
+    if executor == "thread":
+        pool = ThreadPoolExecutor(max_workers)
+        call = handler.handle
+    elif executor == "process":
+        pool = ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=(handler,))
+        call = _handle_in_worker
+    else:
+        raise ValueError(f"Unknown executor: {executor}")
+
+    window = 4 * (max_workers or os.cpu_count() or 1)
+    requests = iter(requests)
+    with pool:
+        pending = deque((pool.submit(call, request), request) for request in islice(requests, window))
+        while pending:
+            if ordered:
+                future, request = pending.popleft()
+                yield request, future.result()
+            else:
+                done, _ = wait([future for future, _ in pending], return_when=FIRST_COMPLETED)
+                for future, request in [entry for entry in pending if entry[0] in done]:
+                    pending.remove((future, request))
+                    yield request, future.result()
+            for request in islice(requests, window - len(pending)):
+                pending.append((pool.submit(call, request), request))
+
+
+async def handle_batch_async(handler: BaseHandler, requests: Iterable[str], concurrency: int = 16,
+                             ordered: bool = True) -> AsyncIterator[Tuple[str, Optional[str]]]:
+    """
+    The asyncio flavour of handle_batch(). Handlers whose handle() is a coroutine are awaited; plain handlers are
+    run in the default thread pool so they don't block the event loop.
+    """
+    async def run(request: str) -> Optional[str]:
+        if inspect.iscoroutinefunction(handler.handle):
+            return await handler.handle(request)
+        result = await asyncio.to_thread(handler.handle, request)
+        return await result if inspect.isawaitable(result) else result
+
+    requests = iter(requests)
+    pending = deque((asyncio.ensure_future(run(request)), request) for request in islice(requests, concurrency))
+    while pending:
+        if ordered:
+            task, request = pending.popleft()
+            yield request, await task
+        else:
+            done, _ = await asyncio.wait([task for task, _ in pending], return_when=asyncio.FIRST_COMPLETED)
+            for task, request in [entry for entry in pending if entry[0] in done]:
+                pending.remove((task, request))
+                yield request, task.result()
+        for request in islice(requests, concurrency - len(pending)):
+            pending.append((asyncio.ensure_future(run(request)), request))
+
+
 def client_code(handler: BaseHandler) -> None:
     """
     The client code is usually suited to work with a single handler.
@@ -78,3 +318,23 @@ if __name__ == "__main__":
 
     print("Sub-chain: Squirrel > Dog")
     client_code(squirrel)
+    print("\n")
+
+    # A compiled chain answers exactly like the original one.
+    print("Compiled chain: Monkey > Squirrel > Dog")
+    client_code(monkey.compile())
+    print("\n")
+
+    # An adaptive chain moves the busiest handlers to the front.
+    adaptive = InstrumentedChain(monkey, adaptive=True, reorder_every=10)
+    for food in ["MeatBall"] * 20 + ["Banana"] * 5 + ["Nut"]:
+        adaptive.handle(food)
+    print("Adaptive chain: " + " > ".join(type(handler).__name__ for handler in adaptive.order))
+    for entry in adaptive.dump_stats():
+        print(f"\t{entry['handler']}: offered {entry['offered']}, accepted {entry['accepted']}")
+    print("\n")
+
+    # Batches of requests can be spread over a pool of workers.
+    print("Batch on a thread pool:")
+    for food, result in handle_batch(monkey, ["Nut", "Banana", "MeatBall", "Cup of coffee"], executor="thread"):
+        print(f"\t{food}: {result or 'left untouched'}")
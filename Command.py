@@ -1,4 +1,11 @@
+import os
+import queue
+import sys
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
 
 class Command(ABC):
@@ -6,16 +13,30 @@ class Command(ABC):
     The switch interface, that all commands will implement
     """
     _backup = None
+    overwritesState = False  # True when the result doesn't depend on the previous state, e.g. switching on
 
     def __init__(self, light: "Light") -> None:  # The _light is the Receiver
         self._light = light
 
+    @property
+    def receiver(self) -> "Light":
+        return self._light
+
     def backup(self):
         self._backup = self._light.state
 
     def undo(self):
         self._light.state = self._backup
 
+    def snapshot(self) -> Any:
+        """
+        Returns a standalone copy of the receiver state, so every history entry can keep its own.
+        """
+        return self._light.state
+
+    def restore(self, snapshot: Any) -> None:
+        self._light.state = snapshot
+
     @abstractmethod
     def execute(self) -> None:
         pass
@@ -25,6 +46,8 @@ class SwitchOnCommand(Command):
     """SWITCH ON COMMAND
     A Command object, that implements the Command interface and runs the command on the designated Receiver
     """
+    overwritesState = True
+
     def execute(self) -> None:
         self.backup()
         print("Turning light on...")
@@ -35,6 +58,8 @@ class SwitchOffCommand(Command):
     """SWITCH OFF COMMAND
     A Command object, that implements the Command interface and runs the command on the designated Receiver
     """
+    overwritesState = True
+
     def execute(self) -> None:
         self.backup()
         print("Turning light off...")
@@ -69,14 +94,366 @@ class Light:
             print("\033[31;1m" + "Light is OFF" + "\033[0m")
 
 
+class LightBank:
+    """RECEIVER
+    Many lights packed into the bits of one integer, so a single command can switch thousands of them with one
+    bitwise operation. Lights are selected with masks; rangeMask() builds the mask of a range of indexes.
+    """
+
+    def __init__(self, size: int) -> None:
+        self._size = size
+        self._bits = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @staticmethod
+    def rangeMask(start: int, stop: int) -> int:
+        return ((1 << (stop - start)) - 1) << start
+
+    def turnOn(self, mask: int) -> None:
+        self._bits |= mask
+
+    def turnOff(self, mask: int) -> None:
+        self._bits &= ~mask
+
+    def isOn(self, index: int) -> bool:
+        return bool(self._bits >> index & 1)
+
+    def countOn(self) -> int:
+        return self._bits.bit_count()
+
+    def read(self, mask: int) -> int:
+        return self._bits & mask
+
+    def write(self, mask: int, bits: int) -> None:
+        self._bits = (self._bits & ~mask) | (bits & mask)
+
+    @property
+    def state(self) -> int:
+        return self._bits
+
+    @state.setter
+    def state(self, state: int) -> None:
+        self._bits = state
+
+    def showState(self) -> None:
+        print(f"{self.countOn()} of {self._size} lights are ON")
+
+
+class BankCommand(Command):
+    """
+    Base for commands on a LightBank. They target a range of lights or an arbitrary mask, and their backups only
+    keep the bits under the mask, shifted down to its lowest light, instead of a copy of the whole bank.
+    """
+
+    def __init__(self, bank: LightBank, start: int = 0, stop: Optional[int] = None, mask: Optional[int] = None) -> None:
+        super().__init__(bank)
+        if mask is None:
+            mask = LightBank.rangeMask(start, bank.size if stop is None else stop)
+        self._mask = mask
+        self._shift = (mask & -mask).bit_length() - 1 if mask else 0
+
+    def backup(self):
+        self._backup = self.snapshot()
+
+    def undo(self):
+        self.restore(self._backup)
+
+    def snapshot(self) -> int:
+        return self._light.read(self._mask) >> self._shift
+
+    def restore(self, snapshot: int) -> None:
+        self._light.write(self._mask, snapshot << self._shift)
+
+
+class SwitchBankOnCommand(BankCommand):
+    def execute(self) -> None:
+        self.backup()
+        print(f"Turning {self._mask.bit_count()} lights on...")
+        self._light.turnOn(self._mask)
+
+
+class SwitchBankOffCommand(BankCommand):
+    def execute(self) -> None:
+        self.backup()
+        print(f"Turning {self._mask.bit_count()} lights off...")
+        self._light.turnOff(self._mask)
+
+
+class CommandHistory:
+    """
+    A ring buffer of executed commands. Each entry stores the command together with its own snapshot of the
+    receiver state, so undo stays correct when the same command runs many times in a row.
+    The oldest entries are dropped when there are more than `depth` of them, or when their snapshots take more
+    than `maxBytes` (as measured by sys.getsizeof).
+    """
+
+    def __init__(self, depth: Optional[int] = None, maxBytes: Optional[int] = None) -> None:
+        self._undo: Deque[Tuple[str, Command, Any]] = deque(maxlen=depth)
+        self._redo: Deque[Tuple[str, Command]] = deque(maxlen=depth)
+        self._maxBytes = maxBytes
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._undo)
+
+    def __iter__(self):
+        return (commandName for commandName, _, _ in self._undo)
+
+    def push(self, commandName: str, command: Command, snapshot: Any) -> None:
+        """
+        Records a command that has just been executed; a new command makes the undone ones unreachable.
+        """
+        self._record(commandName, command, snapshot)
+        self._redo.clear()
+
+    def _record(self, commandName: str, command: Command, snapshot: Any) -> None:
+        if len(self._undo) == self._undo.maxlen:
+            self._bytes -= sys.getsizeof(self._undo[0][2])
+        self._undo.append((commandName, command, snapshot))
+        self._bytes += sys.getsizeof(snapshot)
+        while self._maxBytes is not None and self._bytes > self._maxBytes and len(self._undo) > 1:
+            self._bytes -= sys.getsizeof(self._undo.popleft()[2])
+
+    def undo(self) -> Optional[str]:
+        if not self._undo:
+            return None
+        commandName, command, snapshot = self._undo.pop()
+        self._bytes -= sys.getsizeof(snapshot)
+        command.restore(snapshot)
+        self._redo.append((commandName, command))
+        return commandName
+
+    def redo(self) -> Optional[str]:
+        if not self._redo:
+            return None
+        commandName, command = self._redo.pop()
+        snapshot = command.snapshot()
+        command.execute()
+        self._record(commandName, command, snapshot)
+        return commandName
+
+    def canRedo(self) -> bool:
+        return bool(self._redo)
+
+
+class CommandJournal:
+    """
+    An append-only, line-oriented log of executed commands that lets a Switch survive restarts.
+    "C <commandName>" lines record commands and "S <state>" lines are checkpoints of the Light state.
+    Lines are buffered and written with a single fsync every `groupSize` records (group commit), or `maxDelay`
+    seconds after the oldest buffered record at the latest, so a quiet Switch doesn't keep its last commands in
+    memory. Every
+    `checkpointEvery` commands the journal is atomically replaced by a single checkpoint line, so it never holds more
+    than the commands since the latest checkpoint and replay stays short however long the Switch has been running.
+    """
+
+    def __init__(self, path: str, light: "Light", groupSize: int = 64, checkpointEvery: int = 1000,
+                 maxDelay: float = 0.05) -> None:
+        self._path = path
+        self._light = light
+        self._groupSize = groupSize
+        self._checkpointEvery = checkpointEvery
+        self._maxDelay = maxDelay
+        self._pending: List[str] = []
+        self._sinceCheckpoint = 0
+        self._file = None
+        self._timer: Optional[threading.Timer] = None  # Flushes the pending records once the oldest is maxDelay old
+        self._lock = threading.RLock()
+
+    def append(self, commandName: str) -> None:
+        with self._lock:
+            if not self._pending:
+                self._timer = threading.Timer(self._maxDelay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+            self._pending.append(f"C {commandName}\n")
+            self._sinceCheckpoint += 1
+            if self._sinceCheckpoint >= self._checkpointEvery:
+                self.checkpoint()
+            elif len(self._pending) >= self._groupSize:
+                self.flush()
+
+    def _clearPending(self) -> None:
+        self._pending.clear()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def checkpoint(self) -> None:
+        """
+        Replaces the journal with the current Light state; the commands logged so far are no longer needed.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            temporaryPath = self._path + ".tmp"
+            with open(temporaryPath, "w", encoding="utf-8") as checkpoint:
+                checkpoint.write(f"S {self._light.state}\n")
+                checkpoint.flush()
+                os.fsync(checkpoint.fileno())
+            os.replace(temporaryPath, self._path)
+            self._clearPending()
+            self._sinceCheckpoint = 0
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            if self._file is None:
+                self._file = open(self._path, "a", encoding="utf-8")
+            self._file.write("".join(self._pending))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._clearPending()
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def replay(self, commands: Dict[str, Command]) -> int:
+        """
+        Restores the Light from the checkpoint and re-executes the commands logged after it.
+        A last line without its newline was torn by a crash during a write: it is dropped from the file.
+        Returns the number of re-executed commands.
+        """
+        if not os.path.exists(self._path):
+            return 0
+        with open(self._path, "rb+") as journal:
+            content = journal.read()
+            complete = content.rfind(b"\n") + 1
+            if complete < len(content):
+                journal.truncate(complete)
+        replayed = 0
+        for line in content[:complete].decode("utf-8").splitlines():
+            if line.startswith("S "):
+                self._light.state = int(line[2:])
+                replayed = 0
+            elif line.startswith("C "):
+                commands[line[2:]].execute()
+                replayed += 1
+        self._sinceCheckpoint = replayed
+        return replayed
+
+
+class CommandExecutor:
+    """
+    Runs commands submitted by many producers on a pool of worker threads.
+    All commands of a receiver go to the same worker, so they run in submission order. Each worker has a bounded
+    queue: submit() blocks when it is full, which applies backpressure to the producers.
+    A worker drains its queue in batches and coalesces commands that overwrite the receiver state: of on/off/on
+    queued on the same Light only the last "on" runs. A command that raises is counted as failed in metrics()
+    (the latest error is kept in `lastError`) and the worker moves on.
+    """
+
+    _STOP = object()
+
+    def __init__(self, workers: int = 4, maxPending: int = 1000, batchSize: int = 64) -> None:
+        self._queues = [queue.Queue(maxPending) for _ in range(workers)]
+        self._batchSize = batchSize
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._executed = 0
+        self._coalesced = 0
+        self._failed = 0
+        self.lastError: Optional[BaseException] = None
+        self._latencyTotal = 0.0
+        self._latencyMax = 0.0
+        self._started = time.perf_counter()
+        self._threads = [threading.Thread(target=self._work, args=(q,), daemon=True) for q in self._queues]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, command: Command) -> None:
+        with self._lock:
+            self._submitted += 1
+        self._queues[hash(id(command.receiver)) % len(self._queues)].put((command, time.perf_counter()))
+
+    def close(self) -> None:
+        """
+        Runs everything already submitted, then stops the workers.
+        """
+        for q in self._queues:
+            q.put(self._STOP)
+        for thread in self._threads:
+            thread.join()
+
+    def _work(self, q: "queue.Queue") -> None:
+        while True:
+            batch = [q.get()]
+            while len(batch) < self._batchSize:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+            stop = batch[-1] is self._STOP
+            if stop:
+                batch.pop()
+            self._run(batch)
+            if stop:
+                return
+
+    def _run(self, batch: List[Tuple[Command, float]]) -> None:
+        toRun: List[Optional[Tuple[Command, float]]] = []
+        lastOverwrite: Dict[int, int] = {}
+        for entry in batch:
+            command = entry[0]
+            receiverId = id(command.receiver)
+            if command.overwritesState:
+                if receiverId in lastOverwrite:
+                    toRun[lastOverwrite[receiverId]] = None
+                lastOverwrite[receiverId] = len(toRun)
+            else:
+                lastOverwrite.pop(receiverId, None)
+            toRun.append(entry)
+        failed = 0
+        for entry in toRun:
+            if entry:
+                try:
+                    entry[0].execute()
+                except Exception as error:
+                    # A failing command must not take the worker, and every command queued behind it, down with it
+                    failed += 1
+                    self.lastError = error
+        now = time.perf_counter()
+        latencies = [now - submittedAt for _, submittedAt in batch]
+        with self._lock:
+            self._executed += sum(1 for entry in toRun if entry) - failed
+            self._coalesced += sum(1 for entry in toRun if not entry)
+            self._failed += failed
+            self._latencyTotal += sum(latencies)
+            self._latencyMax = max([self._latencyMax] + latencies)
+
+    def metrics(self) -> Dict[str, float]:
+        with self._lock:
+            done = self._executed + self._coalesced + self._failed  # Every command whose latency was counted
+            return {
+                "submitted": self._submitted,
+                "executed": self._executed,
+                "coalesced": self._coalesced,
+                "failed": self._failed,
+                "avgLatency": self._latencyTotal / done if done else 0.0,
+                "maxLatency": self._latencyMax,
+                "throughput": done / (time.perf_counter() - self._started),
+            }
+
+
 class Switch:
     """INVOKER
     The Invoker is associated with one or several commands. It sends a request to the command.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, depth: Optional[int] = None, maxBytes: Optional[int] = None,
+                 journal: Optional[CommandJournal] = None) -> None:
         self._commands = {}
-        self._history = []
+        self._history = CommandHistory(depth, maxBytes)
+        self._journal = journal
 
     def showHistory(self) -> None:
         """
@@ -96,20 +473,49 @@ class Switch:
         Execute a registered command
         """
         if commandName in self._commands.keys():
-            self._commands[commandName].execute()
-            self._history.append(self._commands[commandName])
+            command = self._commands[commandName]
+            snapshot = command.snapshot()
+            command.execute()
+            self._history.push(commandName, command, snapshot)
+            if self._journal:
+                self._journal.append(commandName)
         else:
             print(f"Command [{commandName}] not recognised")
 
     def undo(self):
         if len(self._history):
             print("Undoing last command...")
-            lastCommand = self._history[-1]
-            lastCommand.undo()
-            self._history.pop(-1)
+            self._history.undo()
+            if self._journal:
+                # Undo is journaled as a checkpoint of the restored state
+                self._journal.checkpoint()
         else:
             print("No commands to undo!")
 
+    def restore(self) -> None:
+        """
+        Brings the receiver back to the state recorded in the journal, if there is one
+        """
+        if self._journal:
+            replayed = self._journal.replay(self._commands)
+            print(f"Replayed {replayed} command(s) from the journal")
+
+    def redo(self):
+        if self._history.canRedo():
+            print("Redoing last undone command...")
+            commandName = self._history.redo()
+            if self._journal:
+                self._journal.append(commandName)
+        else:
+            print("No commands to redo!")
+
+    def close(self) -> None:
+        """
+        Writes out the journal's pending commands and closes it, if there is one
+        """
+        if self._journal:
+            self._journal.close()
+
 
 if __name__ == "__main__":
     # Create the Receiver (a Light)
@@ -136,3 +542,55 @@ if __name__ == "__main__":
     light.showState()
     switch.undo()
     light.showState()
+    switch.redo()
+    light.showState()
+
+    # Repeating a command no longer overwrites the state that undo has to restore.
+    switch.executeCommand("off")
+    switch.executeCommand("on")
+    switch.executeCommand("on")
+    switch.showHistory()
+    switch.undo()
+    switch.undo()
+    light.showState()
+
+    # A journaled Switch picks up where the previous run left off.
+    import tempfile
+
+    journalPath = os.path.join(tempfile.mkdtemp(), "switch.journal")
+    for run in range(2):
+        light = Light()
+        journal = CommandJournal(journalPath, light, checkpointEvery=2)
+        switch = Switch(journal=journal)
+        switch.registerCommand("on", SwitchOnCommand(light))
+        switch.registerCommand("off", SwitchOffCommand(light))
+        switch.restore()
+        light.showState()
+        switch.executeCommand("off")
+        switch.executeCommand("off")
+        switch.executeCommand("on")
+        switch.close()
+
+    # Many producers can share a queued executor; redundant commands on the same Light are coalesced.
+    lights = [Light() for _ in range(3)]
+    executor = CommandExecutor(workers=2)
+    for light in lights:
+        for command in (SwitchOnCommand(light), SwitchOffCommand(light), SwitchOnCommand(light)):
+            executor.submit(command)
+    executor.close()
+    for light in lights:
+        light.showState()
+    print(executor.metrics())
+
+    # A LightBank switches thousands of lights with a single command, and undo still works.
+    bank = LightBank(20000)
+    evenLights = sum(1 << index for index in range(0, 20000, 2))
+    switch = Switch()
+    switch.registerCommand("first half on", SwitchBankOnCommand(bank, 0, 10000))
+    switch.registerCommand("even off", SwitchBankOffCommand(bank, mask=evenLights))
+    switch.executeCommand("first half on")
+    bank.showState()
+    switch.executeCommand("even off")
+    bank.showState()
+    switch.undo()
+    bank.showState()
@@ -1,12 +1,23 @@
+import math
 from abc import ABC, abstractmethod
-from typing import Set
+from array import array
+from collections import deque
+from typing import Iterable, Optional, Set
 
 
 class Component(ABC):
     """
     The base Component class declares common operations for both simple and
     complex objects of a composition.
+    Every component knows the Box it was added to, so a change can invalidate the cached totals up the tree.
     """
+    _parent: Optional["Box"] = None
+
+    def _invalidate(self) -> None:
+        box = self._parent
+        while box is not None and box._total is not None:
+            box._total = None
+            box = box._parent
 
     @abstractmethod
     def price(self) -> float:
@@ -22,26 +33,149 @@ class Product(Component):
     def price(self) -> float:
         return self._price
 
+    @price.setter
+    def price(self, price: float) -> None:
+        self._price = price
+        self._invalidate()
+
 
 class Box(Component):
+    """
+    A Box caches its total price. The cache is dropped when the Box, or anything below it, changes, so repeated
+    reads are O(1) and a change costs at most O(depth).
+    """
 
     def __init__(self, price: float) -> None:
         self._price = price
         self._components: Set[Component] = set()
+        self._total: Optional[float] = None
 
     def add(self, component: Component) -> None:
+        """
+        A component lives in one Box at a time: adding it here takes it out of its previous Box.
+        """
+        if component._parent is not None and component._parent is not self:
+            component._parent.remove(component)
         self._components.add(component)
+        component._parent = self
+        self._total = None
+        self._invalidate()
 
     def remove(self, component: Component) -> None:
         self._components.remove(component)
+        component._parent = None
+        self._total = None
+        self._invalidate()
 
     @property
     def price(self) -> float:
-        totalPrice = self._price
-        for product in self._components:
-            totalPrice += product.price
+        if self._total is None:
+            self._computeTotals()
+
+        return self._total
+
+    def _computeTotals(self) -> None:
+        # Post-order walk with an explicit stack, so deep nesting can't hit the recursion limit.
+        stack = [(self, False)]
+        while stack:
+            box, childrenDone = stack.pop()
+            if childrenDone:
+                totalPrice = box._price
+                for product in box._components:
+                    totalPrice += product._total if isinstance(product, Box) else product.price
+                box._total = totalPrice
+            else:
+                stack.append((box, True))
+                stack.extend((child, False) for child in box._components
+                             if isinstance(child, Box) and child._total is None)
+
+    @price.setter
+    def price(self, price: float) -> None:
+        self._price = price
+        self._total = None
+        self._invalidate()
+
+
+class FlatTree:
+    """
+    A compact, struct-of-arrays copy of a Component tree, for hierarchies too large to keep as one object per node.
+    Nodes are numbered in breadth-first order, so every parent comes before its children and the children of node
+    i are the nodes offsets[i] to offsets[i + 1]. All subtree totals are then computed in one bottom-up pass.
+    """
 
-        return totalPrice
+    def __init__(self) -> None:
+        self.parents = array("q")
+        self.prices = array("d")
+        self.isBox = array("b")
+        self.offsets = array("q", [1])
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    @classmethod
+    def fromComponent(cls, root: Component) -> "FlatTree":
+        tree = cls()
+        queue = deque([(root, -1)])
+        while queue:
+            component, parent = queue.popleft()
+            index = len(tree.prices)
+            tree.parents.append(parent)
+            tree.prices.append(component._price)
+            children = component._components if isinstance(component, Box) else ()
+            tree.isBox.append(isinstance(component, Box))
+            tree.offsets.append(tree.offsets[-1] + len(children))
+            queue.extend((child, index) for child in children)
+        return tree
+
+    def toComponent(self, index: int = 0) -> Component:
+        """
+        Rebuilds the Component objects of the subtree under node index, following the child offsets, so the cost
+        only depends on the size of that subtree.
+        """
+        root = self._node(index)
+        stack = [(index, root)]
+        while stack:
+            parent, box = stack.pop()
+            for child in range(self.offsets[parent], self.offsets[parent + 1]):
+                component = self._node(child)
+                box.add(component)
+                if self.isBox[child]:
+                    stack.append((child, component))
+        return root
+
+    def _node(self, index: int) -> Component:
+        return Box(self.prices[index]) if self.isBox[index] else Product(self.prices[index])
+
+    def totals(self) -> array:
+        """
+        Returns the total price of the subtree under every node.
+        """
+        totals = array("d", self.prices)
+        parents = self.parents
+        for child in range(len(totals) - 1, 0, -1):
+            totals[parents[child]] += totals[child]
+        return totals
+
+
+def _add(prices: Iterable[float], compensated: bool) -> float:
+    return math.fsum(prices) if compensated else sum(prices)
+
+
+def _ownPrices(component: Component) -> Iterable[float]:
+    stack = [component]
+    while stack:
+        component = stack.pop()
+        yield component._price
+        if isinstance(component, Box):
+            stack.extend(component._components)
+
+
+def totalPrice(component: Component, compensated: bool = False) -> float:
+    """
+    Computes the same total as component.price without caching and without recursion: the total of a tree is the
+    sum of the own prices of all its nodes. compensated=True uses math.fsum to avoid rounding errors.
+    """
+    return _add(_ownPrices(component), compensated)
 
 
 def client_code(component: Component) -> None:
@@ -69,3 +203,28 @@ if __name__ == "__main__":
 
     print("\nClient: I've got a complex composite component:")
     client_code(box)
+
+    # Changing a product deep down the tree updates the cached totals above it.
+    cheap = Product(1.0)
+    smallerBox2.add(cheap)
+    client_code(box)
+    cheap.price = 3.0
+    print("\nClient: one product got more expensive:")
+    client_code(box)
+
+    # Large hierarchies can be flattened into arrays and priced in one pass.
+    flat = FlatTree.fromComponent(box)
+    print(f"\nClient: the flat tree has {len(flat)} nodes and a total of {flat.totals()[0]:.2f} €")
+    client_code(flat.toComponent())
+
+    # Very deep trees are priced without recursion.
+    deepest = deep = Box(0.0)
+    for _ in range(100_000):
+        inner = Box(0.01)
+        deepest.add(inner)
+        deepest = inner
+    wide = Box(0.0)
+    wide.add(deep)
+    wide.add(box)
+    print(f"\nClient: a 100000 levels deep tree costs {wide.price:.2f} €, "
+          f"{totalPrice(wide, compensated=True):.2f} € with compensated summation")
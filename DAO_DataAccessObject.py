@@ -1,8 +1,17 @@
+import queue
+import sqlite3
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import List
+from array import array
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 
 class Student:
+    __slots__ = ("_name", "_rollNo")
 
     def __init__(self, name: str, rollNo: int) -> None:
         self._name = name
@@ -62,6 +71,360 @@ class StudentDAO(StudentDAOInterface):
         print(f"Student: RollNo {student.getRollNo()}, deleted from the database")
 
 
+class IndexedStudentDAO(StudentDAOInterface):
+    """
+    Keeps students in a dict keyed by rollNo, so get, update and delete are O(1) and deleting a student doesn't
+    shift the others. A name index answers findByName() in O(1); the optional prefix index (a sorted list of
+    names) answers findByNamePrefix() with a binary search, at the cost of O(n) inserts and deletes.
+    """
+
+    def __init__(self, students: Optional[List[Student]] = None, indexPrefix: bool = False) -> None:
+        self._students: Dict[int, Student] = {}
+        self._byName: Dict[str, Dict[int, Student]] = {}
+        self._indexedNames: Dict[int, str] = {}  # Students are live objects: their name may change before an update
+        self._sortedNames: Optional[List[Tuple[str, int]]] = [] if indexPrefix else None
+        for student in students or []:
+            self.insertStudent(student)
+
+    def _index(self, student: Student) -> None:
+        self._indexedNames[student.getRollNo()] = student.getName()
+        self._byName.setdefault(student.getName(), {})[student.getRollNo()] = student
+        if self._sortedNames is not None:
+            insort(self._sortedNames, (student.getName(), student.getRollNo()))
+
+    def _unindex(self, rollNo: int) -> None:
+        name = self._indexedNames.pop(rollNo)
+        sameName = self._byName[name]
+        del sameName[rollNo]
+        if not sameName:
+            del self._byName[name]
+        if self._sortedNames is not None:
+            del self._sortedNames[bisect_left(self._sortedNames, (name, rollNo))]
+
+    def insertStudent(self, student: Student) -> None:
+        if student.getRollNo() in self._students:
+            raise KeyError(f"RollNo {student.getRollNo()} is already in the database")
+        self._students[student.getRollNo()] = student
+        self._index(student)
+
+    def getAllStudents(self) -> List[Student]:
+        return list(self._students.values())
+
+    def getStudent(self, rollNo: int) -> Optional[Student]:
+        return self._students.get(rollNo)
+
+    def updateStudent(self, student: Student) -> None:
+        stored = self._students[student.getRollNo()]
+        self._unindex(stored.getRollNo())
+        stored.setName(student.getName())
+        self._index(stored)
+        print(f"Student: RollNo {student.getRollNo()}, updated in the database")
+
+    def deleteStudent(self, student: Student) -> None:
+        del self._students[student.getRollNo()]
+        self._unindex(student.getRollNo())
+        print(f"Student: RollNo {student.getRollNo()}, deleted from the database")
+
+    def findByName(self, name: str) -> List[Student]:
+        return list(self._byName.get(name, {}).values())
+
+    def findByNamePrefix(self, prefix: str) -> List[Student]:
+        if self._sortedNames is None:
+            raise ValueError("The prefix index is disabled, create the DAO with indexPrefix=True")
+        result = []
+        for index in range(bisect_left(self._sortedNames, (prefix,)), len(self._sortedNames)):
+            name, rollNo = self._sortedNames[index]
+            if not name.startswith(prefix):
+                break
+            result.append(self._students[rollNo])
+        return result
+
+
+class SQLiteStudentDAO(StudentDAOInterface):
+    """
+    Stores students in a SQLite database file, in WAL mode so readers don't block the writer.
+    Connections come from a thread-safe pool; every query uses a constant parametrised statement, which sqlite3
+    prepares once per connection and keeps in its statement cache. The bulk methods run as single transactions, and
+    getAllStudents() is a generator that fetches rows in batches instead of building one huge list; it reads on its
+    own connection, so a long or abandoned scan never holds a pooled one. Waiting for a pooled connection gives up
+    after `timeout` seconds.
+    Every connection opens the file on its own, so an in-memory database (":memory:") can't be shared and is refused.
+    """
+
+    def __init__(self, path: str, poolSize: int = 4, batchSize: int = 1000, timeout: float = 30.0) -> None:
+        if path == ":memory:" or path.startswith("file::memory:"):
+            raise ValueError("SQLiteStudentDAO needs a database file: every pooled connection opens its own database")
+        self._path = path
+        self._batchSize = batchSize
+        self._timeout = timeout
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(poolSize):
+            self._pool.put(self._connect())
+        with self._connection() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS students (rollNo INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self._path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        try:
+            connection = self._pool.get(timeout=self._timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No database connection became free within {self._timeout}s") from None
+        try:
+            with connection:  # Commits on success, rolls back on error
+                yield connection
+        finally:
+            self._pool.put(connection)
+
+    def close(self) -> None:
+        while not self._pool.empty():
+            self._pool.get().close()
+
+    def insertStudent(self, student: Student) -> None:
+        self.insertMany([student])
+
+    def insertMany(self, students: Iterable[Student]) -> None:
+        with self._connection() as connection:
+            connection.executemany("INSERT INTO students (rollNo, name) VALUES (?, ?)",
+                                   ((student.getRollNo(), student.getName()) for student in students))
+
+    def getAllStudents(self) -> Iterator[Student]:
+        connection = self._connect()
+        try:
+            cursor = connection.execute("SELECT rollNo, name FROM students ORDER BY rollNo")
+            while True:
+                rows = cursor.fetchmany(self._batchSize)
+                if not rows:
+                    break
+                for rollNo, name in rows:
+                    yield Student(name, rollNo)
+        finally:
+            connection.close()
+
+    def getStudent(self, rollNo: int) -> Optional[Student]:
+        with self._connection() as connection:
+            row = connection.execute("SELECT name FROM students WHERE rollNo = ?", (rollNo,)).fetchone()
+        return Student(row[0], rollNo) if row else None
+
+    def updateStudent(self, student: Student) -> None:
+        self.updateMany([student])
+        print(f"Student: RollNo {student.getRollNo()}, updated in the database")
+
+    def updateMany(self, students: Iterable[Student]) -> None:
+        with self._connection() as connection:
+            connection.executemany("UPDATE students SET name = ? WHERE rollNo = ?",
+                                   ((student.getName(), student.getRollNo()) for student in students))
+
+    def deleteStudent(self, student: Student) -> None:
+        self.deleteMany([student])
+        print(f"Student: RollNo {student.getRollNo()}, deleted from the database")
+
+    def deleteMany(self, students: Iterable[Student]) -> None:
+        with self._connection() as connection:
+            connection.executemany("DELETE FROM students WHERE rollNo = ?",
+                                   ((student.getRollNo(),) for student in students))
+
+
+class CachingStudentDAO(StudentDAOInterface):
+    """
+    Wraps any StudentDAOInterface with a bounded LRU cache for getStudent(), optionally with a TTL.
+    Missing rollNos are cached too (negative cache), and writes go straight to the wrapped DAO and drop the cached
+    entry. stats() reports hits, misses and evictions to help sizing the cache.
+    A read that misses fetches from the wrapped DAO outside the lock; a write on the same rollNo meanwhile bumps the
+    key's generation, and the possibly stale row that was read is then returned but not cached.
+    Rows are cached as (name, rollNo) data and every hit builds a new Student, so a caller mutating what it got
+    back can't change what the next caller reads.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, dao: StudentDAOInterface, maxSize: int = 1024, ttl: Optional[float] = None) -> None:
+        self._dao = dao
+        self._maxSize = maxSize
+        self._ttl = ttl
+        self._cache: "OrderedDict[int, Tuple[object, float]]" = OrderedDict()  # rollNo -> ((name, rollNo), time)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._negativeHits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._reading: Dict[int, List[int]] = {}  # rollNo -> [readers in flight, generation]
+
+    def _invalidate(self, rollNo: int) -> None:
+        with self._lock:
+            self._cache.pop(rollNo, None)
+            if rollNo in self._reading:
+                self._reading[rollNo][1] += 1
+
+    def getAllStudents(self) -> List[Student]:
+        return self._dao.getAllStudents()
+
+    def getStudent(self, rollNo: int) -> Optional[Student]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(rollNo)
+            if entry is not None and (self._ttl is None or now - entry[1] < self._ttl):
+                self._cache.move_to_end(rollNo)
+                if entry[0] is self._MISSING:
+                    self._negativeHits += 1
+                    return None
+                self._hits += 1
+                return Student(*entry[0])
+            self._misses += 1
+            reading = self._reading.setdefault(rollNo, [0, 0])
+            reading[0] += 1
+            generation = reading[1]
+        try:
+            student = self._dao.getStudent(rollNo)
+        except BaseException:
+            with self._lock:
+                self._doneReading(rollNo, reading)
+            raise
+        with self._lock:
+            self._doneReading(rollNo, reading)
+            # Checked under the same lock as the bookkeeping above, so no write can slip in between
+            if reading[1] == generation:
+                self._store(rollNo, student, now)
+        return student
+
+    def _doneReading(self, rollNo: int, reading: List[int]) -> None:
+        reading[0] -= 1
+        if not reading[0]:
+            del self._reading[rollNo]
+
+    def _store(self, rollNo: int, student: Optional[Student], now: float) -> None:
+        row = self._MISSING if student is None else (student.getName(), student.getRollNo())
+        self._cache[rollNo] = (row, now)
+        self._cache.move_to_end(rollNo)
+        while len(self._cache) > self._maxSize:
+            self._cache.popitem(last=False)
+            self._evictions += 1
+
+    def insertStudent(self, student: Student) -> None:
+        self._dao.insertStudent(student)
+        self._invalidate(student.getRollNo())
+
+    def updateStudent(self, student: Student) -> None:
+        self._dao.updateStudent(student)
+        self._invalidate(student.getRollNo())
+
+    def deleteStudent(self, student: Student) -> None:
+        self._dao.deleteStudent(student)
+        self._invalidate(student.getRollNo())
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self._hits, "negativeHits": self._negativeHits, "misses": self._misses,
+                    "evictions": self._evictions, "size": len(self._cache)}
+
+
+class ColumnarStudentDAO(StudentDAOInterface):
+    """
+    Stores students column by column instead of one object each: a sorted array of rollNos, and the names packed as
+    UTF-8 in a single bytearray addressed by start/length arrays. Student objects are only built when they are asked
+    for, so a student costs a few dozen bytes while it stays in the DAO.
+    Lookups are binary searches on the rollNos. Deleted rows are flagged and renamed students get their new name
+    appended to the packed names; compact() reclaims both.
+    """
+
+    def __init__(self, students: Optional[Iterable[Student]] = None) -> None:
+        self._rollNos = array("q")
+        self._starts = array("q")
+        self._lengths = array("q")
+        self._alive = bytearray()
+        self._names = bytearray()
+        for student in students or []:
+            self.insertStudent(student)
+
+    def _row(self, rollNo: int) -> Optional[int]:
+        row = bisect_left(self._rollNos, rollNo)
+        if row < len(self._rollNos) and self._rollNos[row] == rollNo and self._alive[row]:
+            return row
+        return None
+
+    def _name(self, row: int) -> str:
+        start = self._starts[row]
+        return self._names[start:start + self._lengths[row]].decode()
+
+    def _pack(self, name: str) -> Tuple[int, int]:
+        encoded = name.encode()
+        start = len(self._names)
+        self._names += encoded
+        return start, len(encoded)
+
+    def insertStudent(self, student: Student) -> None:
+        rollNo = student.getRollNo()
+        row = bisect_left(self._rollNos, rollNo)
+        exists = row < len(self._rollNos) and self._rollNos[row] == rollNo
+        if exists and self._alive[row]:
+            raise KeyError(f"RollNo {rollNo} is already in the database")  # Before packing, so no name bytes leak
+        start, length = self._pack(student.getName())
+        if exists:
+            self._starts[row], self._lengths[row], self._alive[row] = start, length, 1
+            return
+        # Appending in rollNo order is O(1); an out of order rollNo shifts the rows after it
+        self._rollNos.insert(row, rollNo)
+        self._starts.insert(row, start)
+        self._lengths.insert(row, length)
+        self._alive.insert(row, 1)
+
+    def getAllStudents(self) -> Iterator[Student]:
+        for row, rollNo in enumerate(self._rollNos):
+            if self._alive[row]:
+                yield Student(self._name(row), rollNo)
+
+    def getStudent(self, rollNo: int) -> Optional[Student]:
+        row = self._row(rollNo)
+        return None if row is None else Student(self._name(row), rollNo)
+
+    def updateStudent(self, student: Student) -> None:
+        row = self._row(student.getRollNo())
+        if row is None:
+            raise KeyError(f"RollNo {student.getRollNo()} is not in the database")
+        self._starts[row], self._lengths[row] = self._pack(student.getName())
+        print(f"Student: RollNo {student.getRollNo()}, updated in the database")
+
+    def deleteStudent(self, student: Student) -> None:
+        row = self._row(student.getRollNo())
+        if row is None:
+            raise KeyError(f"RollNo {student.getRollNo()} is not in the database")
+        self._alive[row] = 0
+        print(f"Student: RollNo {student.getRollNo()}, deleted from the database")
+
+    def compact(self) -> None:
+        """
+        Rebuilds the columns from the live rows only, dropping deleted rows and names left behind by renames.
+        """
+        rollNos, starts, lengths, names = array("q"), array("q"), array("q"), bytearray()
+        for row, rollNo in enumerate(self._rollNos):
+            if self._alive[row]:
+                start, length = self._starts[row], self._lengths[row]
+                rollNos.append(rollNo)
+                starts.append(len(names))
+                lengths.append(length)
+                names += self._names[start:start + length]
+        self._rollNos, self._starts, self._lengths, self._names = rollNos, starts, lengths, names
+        self._alive = bytearray(b"\x01") * len(rollNos)
+
+    def columns(self) -> Dict[str, memoryview]:
+        """
+        Zero-copy views of the columns for analytics. The DAO can't grow while a view is alive, so release them
+        (or drop them) before inserting again.
+        """
+        return {
+            "rollNo": memoryview(self._rollNos),
+            "nameStart": memoryview(self._starts),
+            "nameLength": memoryview(self._lengths),
+            "alive": memoryview(self._alive),
+            "names": memoryview(self._names),
+        }
+
+
 if __name__ == "__main__":
 
     studentDAO = StudentDAO()
@@ -80,3 +443,62 @@ if __name__ == "__main__":
     # Get the student
     studentUpdated = studentDAO.getStudent(0)
     print(f"Student: [RollNo : {studentUpdated.getRollNo()}, Name : {studentUpdated.getName()}]")
+
+    print("")
+
+    # The indexed DAO finds students by rollNo or name without scanning
+    indexedDAO = IndexedStudentDAO([Student("Robert", 0), Student("John", 1), Student("Roberta", 2)], indexPrefix=True)
+    indexedDAO.deleteStudent(indexedDAO.getStudent(0))
+    student = indexedDAO.getStudent(1)
+    student.setName("Johnny")
+    indexedDAO.updateStudent(student)
+    print(f"Student with RollNo 2: {indexedDAO.getStudent(2).getName()}")
+    print(f"Students named Johnny: {[s.getRollNo() for s in indexedDAO.findByName('Johnny')]}")
+    print(f"Students whose name starts with Rob: {[s.getName() for s in indexedDAO.findByNamePrefix('Rob')]}")
+
+    print("")
+
+    # The SQLite DAO scales to millions of rows; compare it with the in-memory one
+    import os
+    import tempfile
+
+    students = [Student(f"Student{rollNo}", rollNo) for rollNo in range(200_000)]
+    sqliteDAO = SQLiteStudentDAO(os.path.join(tempfile.mkdtemp(), "students.db"))
+    for name, dao in (("in-memory", IndexedStudentDAO()), ("SQLite", sqliteDAO)):
+        start = time.perf_counter()
+        if isinstance(dao, SQLiteStudentDAO):
+            dao.insertMany(students)
+        else:
+            for student in students:
+                dao.insertStudent(student)
+        inserted = time.perf_counter()
+        for rollNo in range(0, 200_000, 10):
+            dao.getStudent(rollNo)
+        looked = time.perf_counter()
+        count = sum(1 for _ in dao.getAllStudents())
+        scanned = time.perf_counter()
+        print(f"{name}: insert {inserted - start:.3f}s, 20000 lookups {looked - inserted:.3f}s, "
+              f"scan of {count} students {scanned - looked:.3f}s")
+
+    # A cache in front of the SQLite DAO serves the hot students from memory
+    cachedDAO = CachingStudentDAO(sqliteDAO, maxSize=1000)
+    start = time.perf_counter()
+    for rollNo in list(range(500)) * 40 + [-1] * 100:
+        cachedDAO.getStudent(rollNo)
+    print(f"Cached: 20100 lookups {time.perf_counter() - start:.3f}s, {cachedDAO.stats()}")
+    sqliteDAO.close()
+
+    print("")
+
+    # Memory per student: one object per student against packed columns
+    import tracemalloc
+
+    for name, build in (("in-memory", lambda: IndexedStudentDAO([Student(f"Student{n}", n) for n in range(100_000)])),
+                        ("columnar", lambda: ColumnarStudentDAO(Student(f"Student{n}", n) for n in range(100_000)))):
+        tracemalloc.start()
+        dao = build()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name}: {size / 100_000:.1f} bytes per student")
+    columns = dao.columns()
+    print(f"Columnar export: {len(columns['rollNo'])} rollNos, {columns['names'].nbytes} bytes of names")
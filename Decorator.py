@@ -1,4 +1,8 @@
+import asyncio
+import time
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List, Tuple
 
 
 class Notifier(ABC):
@@ -44,28 +48,196 @@ class Decorator(Notifier):
         return self.notifier.send()
 
 
-class SmsDecorator(Decorator):
+class FragmentDecorator(Decorator):
     """
-    Concrete Decorator(s) (like SmsDecoretor and FacebookDecoretor) call the wrapped object and alter its result.
+    A Decorator whose whole behaviour is to append the text of its own channel, deliver(), to the wrapped result.
+    Only decorators that keep this send() can be flattened by NotifierPipeline, FanOutNotifier and BatchNotifier:
+    a subclass that overrides send() is always called as it is.
     """
+    fragment: str = ""
 
     def send(self) -> str:
+        return f"{self.notifier.send()}{self.deliver()}"
+
+    def deliver(self) -> str:
         """
-        Decorators may call parent implementation of the operation, instead of calling the wrapped object directly.
-        This approach simplifies extension of decorator classes.
+        The work of this layer alone, without the wrapped notifier: what fan-out delivery runs for each channel.
         """
-        return f"{self.notifier.send()}" \
-               f"\n SMS Decorator: sending SMS notification."
+        return self.fragment
 
+    def deliverMany(self, messages: List[str]) -> List[str]:
+        """
+        Delivers a whole batch on this channel. Channels with a batch API override it; by default it loops.
+        """
+        return [self.deliver() for _ in messages]
 
-class FacebookDecorator(Decorator):
+
+class SmsDecorator(FragmentDecorator):
+    """
+    Concrete Decorator(s) (like SmsDecoretor and FacebookDecoretor) call the wrapped object and alter its result.
+    Decorators may call parent implementation of the operation, instead of calling the wrapped object directly.
+    This approach simplifies extension of decorator classes.
+    """
+    fragment = "\n SMS Decorator: sending SMS notification."
+
+
+class FacebookDecorator(FragmentDecorator):
     """
     Decorators can execute their behavior either before or after the call to a wrapped object.
     """
+    fragment = "\n Facebook Decorator: sending Facebook notification."
+
+
+class StubChannelDecorator(FragmentDecorator):
+    """
+    A local stand-in for a slow channel (SMS gateway, Facebook API...) with a configurable latency, used to
+    benchmark delivery modes. A batch costs a single round trip. With failing=True the channel raises instead of
+    delivering.
+    """
+
+    def __init__(self, notifier: Notifier, name: str, latency: float, failing: bool = False) -> None:
+        super().__init__(notifier)
+        self.fragment = f"\n {name} Channel: sending {name} notification."
+        self.name = name
+        self._latency = latency
+        self._failing = failing
+
+    def deliver(self) -> str:
+        return self.deliverMany([""])[0]
+
+    def deliverMany(self, messages: List[str]) -> List[str]:
+        time.sleep(self._latency)
+        if self._failing:
+            raise ConnectionError(f"{self.name} channel is down")
+        return [self.fragment] * len(messages)
+
+
+def _layers(notifier: Notifier, constantOnly: bool = False) -> Tuple[Notifier, List[FragmentDecorator]]:
+    """
+    Splits a stack into the notifier at its bottom and the decorators above it, bottom-up. The walk stops at the
+    first decorator that doesn't use FragmentDecorator.send(), which is then treated as the bottom. With
+    constantOnly it also stops at decorators whose deliver() does more than returning their fragment.
+    """
+    decorators: List[FragmentDecorator] = []
+    while isinstance(notifier, FragmentDecorator) and type(notifier).send is FragmentDecorator.send \
+            and (not constantOnly or type(notifier).deliver is FragmentDecorator.deliver):
+        decorators.append(notifier)
+        notifier = notifier.notifier
+    decorators.reverse()
+    return notifier, decorators
+
+
+class NotifierPipeline(Notifier):
+    """
+    A decorator stack flattened once into the notifier at its bottom plus the joined fragments of the decorators
+    above it. send() then costs one call and one concatenation whatever the depth of the stack, and deep stacks no
+    longer hit the recursion limit. Only plain FragmentDecorators are flattened: the walk stops at the first one
+    that overrides send() or deliver(), whose send() is used as is. Decorators can't be re-wrapped after creation,
+    so the joined fragments never go stale.
+    """
+
+    def __init__(self, notifier: Notifier) -> None:
+        self._base, decorators = _layers(notifier, constantOnly=True)
+        self._suffix = "".join(decorator.fragment for decorator in decorators)
+
+    def send(self) -> str:
+        return self._base.send() + self._suffix
+
+
+class FanOutNotifier(Notifier):
+    """
+    Delivers on every channel of a decorator stack at the same time, on a thread pool or on asyncio, so latency is
+    the one of the slowest channel instead of the sum of them all. Each channel gets `timeout` seconds; the text of
+    the channels that made it is joined in stack order, and the ones that failed or timed out are kept in
+    `failures` as (channel, error) pairs.
+    """
+
+    def __init__(self, notifier: Notifier, timeout: float = 5.0, useAsyncio: bool = False) -> None:
+        base, decorators = _layers(notifier)
+        self._channels: List[Notifier] = [base] + decorators  # The base is sent, the decorators above deliver
+        self._timeout = timeout
+        self._useAsyncio = useAsyncio
+        self.failures: List[Tuple[str, BaseException]] = []
+
+    def _run(self, index: int) -> str:
+        channel = self._channels[index]
+        return channel.deliver() if index else channel.send()
 
     def send(self) -> str:
-        return f"{self.notifier.send()}" \
-               f"\n Facebook Decorator: sending Facebook notification."
+        if self._useAsyncio:
+            return asyncio.run(self.sendAsync())
+        pool = ThreadPoolExecutor(len(self._channels))
+        futures = [pool.submit(self._run, index) for index in range(len(self._channels))]
+        wait(futures, self._timeout)
+        pool.shutdown(wait=False, cancel_futures=True)
+        results = []
+        for future in futures:
+            if not future.done():
+                results.append(TimeoutError(f"no answer within {self._timeout}s"))
+            else:
+                results.append(future.exception() or future.result())
+        return self._collect(results)
+
+    async def sendAsync(self) -> str:
+        # A private pool, so that a channel that timed out doesn't hold up the shutdown of the event loop
+        loop = asyncio.get_running_loop()
+        pool = ThreadPoolExecutor(len(self._channels))
+
+        async def run(index: int) -> str:
+            return await asyncio.wait_for(loop.run_in_executor(pool, self._run, index), self._timeout)
+
+        try:
+            results = await asyncio.gather(*(run(index) for index in range(len(self._channels))),
+                                           return_exceptions=True)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+        return self._collect(results)
+
+    def _collect(self, results: list) -> str:
+        self.failures = []
+        parts = []
+        for channel, result in zip(self._channels, results):
+            if isinstance(result, BaseException):
+                if isinstance(result, asyncio.TimeoutError):
+                    result = TimeoutError(f"no answer within {self._timeout}s")
+                self.failures.append((getattr(channel, "name", type(channel).__name__), result))
+            else:
+                parts.append(result)
+        return "".join(parts)
+
+
+class BatchNotifier:
+    """
+    Pushes many messages through a decorator stack with one pass per layer: every channel receives the whole batch
+    through deliverMany() instead of one call per message. A message identical to one sent less than `window`
+    seconds ago is coalesced, i.e. skipped, and counted in `coalesced`.
+    """
+
+    def __init__(self, notifier: Notifier, window: float = 0.0) -> None:
+        self._base, self._decorators = _layers(notifier)
+        self._window = window
+        self._lastSent: Dict[str, float] = {}
+        self.coalesced = 0
+
+    def sendMany(self, messages: Iterable[str]) -> List[str]:
+        now = time.monotonic()
+        self._lastSent = {message: sentAt for message, sentAt in self._lastSent.items()
+                          if now - sentAt < self._window}
+        batch = []
+        for message in messages:
+            if message in self._lastSent:
+                self.coalesced += 1
+                continue
+            if self._window > 0:
+                self._lastSent[message] = now
+            batch.append(message)
+        if not batch:
+            return []
+        base = self._base.send()  # The bottom notifier doesn't depend on the message: one call for the whole batch
+        results = [f"{message}: {base}" for message in batch]
+        for decorator in self._decorators:
+            results = [result + fragment for result, fragment in zip(results, decorator.deliverMany(batch))]
+        return results
 
 
 def client_code(notifier: Notifier) -> None:
@@ -92,3 +264,49 @@ if __name__ == "__main__":
     print("Client: Now I've got a decorated notifier:")
     client_code(decorator2)
     print("\n")
+
+    # Deep stacks can be flattened into a pipeline that gives the same result.
+    deep = simple
+    for _ in range(5000):
+        deep = SmsDecorator(deep)
+    pipeline = NotifierPipeline(deep)
+    print(f"Client: a pipeline of 5000 decorators sends {len(pipeline.send())} characters.")
+    client_code(NotifierPipeline(decorator2))
+    print("\n")
+
+    # Slow channels can be delivered on concurrently; failing ones are reported instead of breaking the send.
+    slow = simple
+    for channel, latency in (("SMS", 0.2), ("Facebook", 0.3), ("Slack", 0.25)):
+        slow = StubChannelDecorator(slow, channel, latency)
+    slow = StubChannelDecorator(slow, "Pager", 0.1, failing=True)
+    for name, notifier in (("sequential", slow), ("thread pool", FanOutNotifier(slow)),
+                           ("asyncio", FanOutNotifier(slow, useAsyncio=True))):
+        start = time.perf_counter()
+        try:
+            notifier.send()
+            outcome = f"failures: {notifier.failures}"
+        except ConnectionError as error:
+            outcome = f"aborted: {error}"
+        print(f"Client: {name} delivery took {time.perf_counter() - start:.2f}s, {outcome}")
+    # Many messages can share one pass through the stack: each channel gets them as a single batch.
+    quick = simple
+    for channel in ("SMS", "Facebook", "Slack"):
+        quick = StubChannelDecorator(quick, channel, 0.002)
+    messages = [f"Hello user{n}" for n in range(100)] * 2
+    start = time.perf_counter()
+    for message in messages:
+        f"{message}: {quick.send()}"
+    loopTime = time.perf_counter() - start
+    start = time.perf_counter()
+    sent = BatchNotifier(quick).sendMany(messages)  # No coalescing: both send the same 200 messages
+    batchTime = time.perf_counter() - start
+    print(f"Client: {len(messages)} messages, per-message loop {loopTime:.3f}s, batch {batchTime:.3f}s "
+          f"({len(sent)} sent)")
+    # Within a window, repeated messages are coalesced instead of being sent again.
+    coalescing = BatchNotifier(quick, window=60.0)
+    sent = coalescing.sendMany(messages)
+    print(f"Client: with a 60s window, {len(sent)} sent and {coalescing.coalesced} coalesced")
+
+    fanOut = FanOutNotifier(slow, timeout=0.22, useAsyncio=True)
+    client_code(fanOut)
+    print(f"\nClient: with a 0.22s timeout, failures: {[channel for channel, _ in fanOut.failures]}")
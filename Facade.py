@@ -1,3 +1,12 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+
 class Subsystem1:
     @staticmethod
     def operation1():
@@ -18,16 +27,87 @@ class Subsystem2:
         print("Subsystem2: Fire!")
 
 
+class OperationCache:
+    """
+    Memoizes facade operations by name and arguments, with LRU eviction and an optional TTL. Results are kept
+    apart for each owner (the facade) in a WeakKeyDictionary, so several facades can share one cache and a facade's
+    results go away with it: a new facade never sees the results of a dead one. maxSize applies per owner.
+    Concurrent identical calls are coalesced (single flight): the first one runs the subsystems and the others wait
+    for its result. Failures are passed on to every waiting caller and are not cached.
+    """
+
+    def __init__(self, maxSize: int = 128, ttl: Optional[float] = None) -> None:
+        self._maxSize = maxSize
+        self._ttl = ttl
+        self._results: "WeakKeyDictionary[Any, OrderedDict[Hashable, Tuple[Any, float]]]" = WeakKeyDictionary()
+        self._inFlight: "WeakKeyDictionary[Any, Dict[Hashable, Future]]" = WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self, owner: Any, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            results = self._results.setdefault(owner, OrderedDict())
+            inFlight = self._inFlight.setdefault(owner, {})
+            entry = results.get(key)
+            if entry is not None and (self._ttl is None or time.monotonic() - entry[1] < self._ttl):
+                results.move_to_end(key)
+                return entry[0]
+            future = inFlight.get(key)
+            leader = future is None
+            if leader:
+                future = inFlight[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            result = compute()
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(result)
+            with self._lock:
+                results[key] = (result, time.monotonic())
+                results.move_to_end(key)
+                while len(results) > self._maxSize:
+                    results.popitem(last=False)
+            return result
+        finally:
+            with self._lock:
+                del inFlight[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
+
+
+def cachedOperation(method: Callable) -> Callable:
+    """
+    Routes a facade operation through the facade's OperationCache, when it has one. Results are keyed by the facade,
+    the operation and its positional and keyword arguments, so several facades can share one cache. Facades must be
+    hashable and weakly referenceable, which plain classes are.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache = getattr(self, "cache", None)
+        if cache is None:
+            return method(self, *args, **kwargs)
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        return cache.get(self, key, lambda: method(self, *args, **kwargs))
+    return wrapper
+
+
 class Facade:
     """
     The Facade class provides a simple interface to the complex logic of one or several subsystems. The Facade delegates
     the client requests to the appropriate objects within the subsystem. The Facade is also responsible for managing
     their lifecycle. All of this shields the client from the undesired complexity of the subsystem.
     """
-    def __init__(self, subsystem1: Subsystem1 = Subsystem1(), subsystem2: Subsystem2 = Subsystem2()) -> None:
-        self.subsystem1 = subsystem1
-        self.subsystem2 = subsystem2
+    def __init__(self, subsystem1: Optional[Subsystem1] = None, subsystem2: Optional[Subsystem2] = None,
+                 cache: Optional[OperationCache] = None) -> None:
+        self.subsystem1 = subsystem1 or Subsystem1()
+        self.subsystem2 = subsystem2 or Subsystem2()
+        self.cache = cache
 
+    @cachedOperation
     def operations(self):
         """
         The Facade's methods are convenient shortcuts to the sophisticated functionality of the subsystems. However,
@@ -42,6 +122,54 @@ class Facade:
         print("Facade has ended!")
 
 
+class LazyFacade(Facade):
+    """
+    A Facade for subsystems with an expensive warm-up. Subsystems are only built the first time they are used, and
+    the operation1 phases run concurrently on a thread pool: the facade waits for all of them only before the
+    operationN phase. The duration of each phase is kept in `timings`.
+    """
+
+    def __init__(self, subsystem1: Callable[[], Subsystem1] = Subsystem1,
+                 subsystem2: Callable[[], Subsystem2] = Subsystem2, cache: Optional[OperationCache] = None) -> None:
+        self.cache = cache
+        self._factories = {"subsystem1": subsystem1, "subsystem2": subsystem2}
+        self._locks = {name: threading.Lock() for name in self._factories}  # One per subsystem: they build in parallel
+        self.timings: Dict[str, float] = {}
+
+    def __getattr__(self, name: str):
+        # Only called for missing attributes: a built subsystem is stored as a plain attribute, so later reads
+        # don't come here any more
+        factories = self.__dict__.get("_factories", {})
+        if name not in factories:
+            raise AttributeError(name)
+        with self._locks[name]:
+            if name not in self.__dict__:  # Another thread may have built it while we waited for the lock
+                self.__dict__[name] = factories[name]()
+            return self.__dict__[name]
+
+    def _timed(self, phase: str, operation: Callable[[], None]) -> None:
+        start = time.perf_counter()
+        operation()
+        self.timings[phase] = time.perf_counter() - start
+
+    @cachedOperation
+    def operations(self):
+        print("Facade initializes subsystems:")
+        start = time.perf_counter()
+        with ThreadPoolExecutor(len(self._factories)) as pool:
+            warmUps = [pool.submit(self._timed, f"{name}.operation1", lambda name=name: getattr(self, name).operation1())
+                       for name in self._factories]
+            for warmUp in warmUps:
+                warmUp.result()  # Barrier: every subsystem must be ready before the action starts
+        self.timings["initialization"] = time.perf_counter() - start
+        print("Facade orders subsystems to perform the action:")
+        start = time.perf_counter()
+        self.subsystem1.operationN()
+        self.subsystem2.operationN()
+        self.timings["action"] = time.perf_counter() - start
+        print("Facade has ended!")
+
+
 class Client:
     """
     The client code works with complex subsystems through a simple interface provided by the Facade. When a facade
@@ -60,3 +188,42 @@ if __name__ == "__main__":
     f = Facade()
 
     Client.run(f)
+
+    # Subsystems with a slow warm-up are better started lazily and in parallel.
+    class SlowSubsystem1(Subsystem1):
+        @staticmethod
+        def operation1():
+            time.sleep(0.3)
+            Subsystem1.operation1()
+
+    class SlowSubsystem2(Subsystem2):
+        @staticmethod
+        def operation1():
+            time.sleep(0.3)
+            Subsystem2.operation1()
+
+    lazy = LazyFacade(SlowSubsystem1, SlowSubsystem2)
+    Client.run(lazy)
+    print({phase: f"{seconds:.2f}s" for phase, seconds in lazy.timings.items()})
+
+    # With a cache, many clients running the facade at once share a single run of the subsystems.
+    shared = LazyFacade(SlowSubsystem1, SlowSubsystem2, cache=OperationCache(ttl=60))
+    clients = [threading.Thread(target=Client.run, args=(shared,)) for _ in range(10)]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+
+    # Facades sharing a cache never see each other's results, even when a new facade is built where a dead one was.
+    runs = []
+
+    class CountingSubsystem1(Subsystem1):
+        @staticmethod
+        def operation1():
+            runs.append(1)
+            Subsystem1.operation1()
+
+    cache = OperationCache()
+    for _ in range(2):
+        Client.run(Facade(CountingSubsystem1(), cache=cache))
+    assert len(runs) == 2, "The second facade reused the results of the first one"
@@ -1,5 +1,9 @@
 # MVC stands for Model - View - Control
 import json
+import re
+from typing import Iterator
+
+_TOKEN_PREFIX = re.compile(r'[0-9A-Za-z.+-]*')
 
 
 # ############################# MODEL ############################# #
@@ -16,17 +20,85 @@ class Model:
         return f"{self.first_name} {self.last_name}"
 
     @classmethod
-    def getAll(cls):
+    def getAll(cls, path='mvc_db.txt'):
         """
         Returns all people inside db.txt as list of Person objects
         """
-        database = open('mvc_db.txt', 'r')
-        result = []
-        json_list = json.loads(database.read())
-        for item in json_list:
-            user = cls(item['first_name'], item['last_name'])
-            result.append(user)
-        return result
+        return list(cls.iterAll(path))
+
+    @classmethod
+    def iterAll(cls, path='mvc_db.txt', chunk_size=1 << 16) -> Iterator["Model"]:
+        """
+        Yields the people of a JSON array file one by one. The file is read in chunks and only the part of the
+        array that hasn't been parsed yet is kept in memory, so huge databases use constant memory.
+        """
+        decoder = json.JSONDecoder()
+        with open(path, 'r', encoding='utf-8') as database:
+            buffer, position, eof = '', 0, False
+            started = False
+            while True:
+                while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                    position += 1
+                if position == len(buffer) and not eof:
+                    chunk = database.read(chunk_size)
+                    eof = not chunk
+                    buffer, position = buffer[position:] + chunk, 0
+                    continue
+                if position == len(buffer):
+                    raise ValueError(f'{path} ends before the end of the JSON array')
+                if not started:
+                    if buffer[position] != '[':
+                        raise ValueError(f'{path} does not contain a JSON array')
+                    started = True
+                    position += 1
+                    continue
+                if buffer[position] == ']':
+                    return
+                try:
+                    item, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError as error:
+                    if eof or not cls._cutByChunk(error, buffer):
+                        raise  # A real syntax error: don't read the rest of the file before reporting it
+                    item, end = None, len(buffer)
+                if end == len(buffer) and not eof:
+                    # The item may be cut at the end of the chunk: read more and parse it again
+                    chunk = database.read(chunk_size)
+                    eof = not chunk
+                    buffer, position = buffer[position:] + chunk, 0
+                    continue
+                yield cls(item['first_name'], item['last_name'])
+                position = end
+
+    @staticmethod
+    def _cutByChunk(error: json.JSONDecodeError, buffer: str) -> bool:
+        """
+        Tells whether a decoding error may only come from the buffer ending in the middle of a token, so that reading
+        more of the file can fix it.
+        """
+        if error.msg.startswith('Unterminated string'):  # The string runs up to the end of the buffer
+            return True
+        if error.msg.startswith('Invalid \\uXXXX escape'):
+            return error.pos + 6 > len(buffer)
+        # A number or literal cut short (e.g. "2." or "tru"): nothing but token characters up to the end
+        return _TOKEN_PREFIX.fullmatch(buffer, error.pos) is not None
+
+    @classmethod
+    def iterJsonLines(cls, path) -> Iterator["Model"]:
+        """
+        Yields the people of a JSON Lines file: one JSON object per line.
+        """
+        with open(path, 'r', encoding='utf-8') as database:
+            for line in database:
+                if line.strip():
+                    item = json.loads(line)
+                    yield cls(item['first_name'], item['last_name'])
+
+    def appendJsonLine(self, path):
+        """
+        Appends this person to a JSON Lines file, without reading or rewriting what is already there
+        """
+        with open(path, 'a', encoding='utf-8') as database:
+            database.write(json.dumps({'first_name': self.first_name, 'last_name': self.last_name}) + '\n')
 
 
 # ############################## VIEW ############################## #